@@ -0,0 +1,120 @@
+﻿"""
+Микробенчмарк: DataFrame-путь против Candles (numpy-колонки) в горячих местах бота.
+
+Для каждой пары печатает время на вызов и память на вызов (tracemalloc: пик и
+сколько осталось занято после вызова). Память, которую pyarrow берёт из своего
+пула, tracemalloc не видит — поэтому чтение parquet сравниваем в основном по времени.
+
+Пример:
+    python -m src.bot.bench_candles --repeat 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from src.bot.services.charts import to_mpf_frame
+from src.bot.services.indicators import calc_indicators, macd, rsi
+from src.bot.services.market_data import get_last_candle, load_candles_last_n, load_df_last_n
+
+
+# ---------- как было: через DataFrame ----------
+
+def _last_candle_df() -> dict:
+    df = load_df_last_n(1)
+    return df.iloc[-1].to_dict()
+
+
+def _indicators_df(df: pd.DataFrame) -> tuple[float, float, float, float]:
+    close = df["close"].astype(float)
+    macd_line, signal, hist = macd(close)
+    return (
+        float(rsi(close, 14).iloc[-1]),
+        float(macd_line.iloc[-1]),
+        float(signal.iloc[-1]),
+        float(hist.iloc[-1]),
+    )
+
+
+def _chart_frame_df(df: pd.DataFrame) -> pd.DataFrame:
+    tmp = df.copy()
+    tmp = tmp.rename(columns={
+        "timestamp_utc": "Date",
+        "open": "Open",
+        "high": "High",
+        "low": "Low",
+        "close": "Close",
+        "volume": "Volume",
+    })
+    tmp["Date"] = pd.to_datetime(tmp["Date"], utc=True)
+    return tmp.set_index("Date")
+
+
+# ---------- проверка: новый путь считает то же, что pandas ----------
+
+def check_indicators(df: pd.DataFrame, sizes: tuple[int, ...] = (30, 100, 400)) -> None:
+    """
+    Сверяет calc_indicators (numpy, за один проход) с rsi()/macd() на pandas
+    на нескольких окнах. Падает, если значения разошлись.
+    """
+    for n in sizes:
+        part = df.tail(n)
+        new = calc_indicators(part)
+        old = _indicators_df(part)
+        got = (new["rsi"], new["macd"], new["signal"], new["hist"])
+        if not np.allclose(got, old, rtol=1e-9, atol=1e-9, equal_nan=True):
+            raise AssertionError(f"❌ Индикаторы разошлись с pandas на {n} свечах: {got} != {old}")
+    print(f"✅ Индикаторы совпадают с pandas rsi()/macd() на окнах {sizes}\n")
+
+
+# ---------- замер ----------
+
+def _measure(fn, repeat: int) -> tuple[float, float, float]:
+    fn()  # прогрев
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    us_per_call = (time.perf_counter() - t0) / repeat * 1e6
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    tracemalloc.reset_peak()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    retained = sum(st.size_diff for st in after.compare_to(before, "filename") if st.size_diff > 0)
+    return us_per_call, peak / 1024, retained / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DataFrame против Candles в горячих путях бота")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    df300, df400 = load_df_last_n(300), load_df_last_n(400)
+    c300, c400 = load_candles_last_n(300), load_candles_last_n(400)
+
+    check_indicators(df400)
+
+    cases = [
+        ("last candle", _last_candle_df, get_last_candle),
+        ("load last 400", lambda: load_df_last_n(400), lambda: load_candles_last_n(400)),
+        ("indicators (400)", lambda: _indicators_df(df400), lambda: calc_indicators(c400)),
+        ("chart frame (300)", lambda: _chart_frame_df(df300), lambda: to_mpf_frame(c300)),
+    ]
+
+    print(f"{'case':>18} {'impl':>10} {'us/call':>10} {'peak KiB':>10} {'kept KiB':>10}")
+    for name, old, new in cases:
+        for impl, fn in (("DataFrame", old), ("Candles", new)):
+            us, peak, kept = _measure(fn, args.repeat)
+            print(f"{name:>18} {impl:>10} {us:>10.1f} {peak:>10.1f} {kept:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
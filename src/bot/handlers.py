@@ -5,13 +5,33 @@ from aiogram.filters import CommandStart
 from aiogram.types import Message, CallbackQuery, FSInputFile
 
 from src.bot.keyboards import main_menu
-from src.bot.services.market_data import get_last_candle, load_df_last_n
+from src.bot.services.market_data import data_version, get_last_candle, load_candles_last_n
+from src.bot.services.candles import Candle
 from src.bot.services.charts import make_candles_chart
 from src.bot.services.indicators import calc_indicators
+from src.bot.storage.file_cache import cached_file, cached_value
 
 router = Router()
 
 
+# Результаты кэшируются на диске по версии данных — общий кэш для всех воркеров webhook-режима
+def _build_chart() -> str:
+    return cached_file(
+        "chart_last_300",
+        data_version(),
+        ".png",
+        lambda path: make_candles_chart(load_candles_last_n(300), path),
+    )
+
+
+def _build_indicators() -> dict:
+    return cached_value("indicators", data_version(), lambda: calc_indicators(load_candles_last_n(400)))
+
+
+def _build_last_candle() -> Candle:
+    return cached_value("last_candle", data_version(), get_last_candle)
+
+
 @router.message(CommandStart())
 async def start(m: Message):
     await m.answer(
@@ -34,35 +54,32 @@ async def help_cb(cb: CallbackQuery):
 
 
 @router.callback_query(F.data == "price_now")
-async def price_now(cb: CallbackQuery):
-    c = get_last_candle()
+async def price_now(cb: CallbackQuery, compute):
+    c = await compute(_build_last_candle)
     txt = (
         "📈 Последняя свеча BTC/USDT (1h)\n"
-        f"🕒 {c['timestamp_utc']}\n"
-        f"Open: {c['open']:.2f}\n"
-        f"High: {c['high']:.2f}\n"
-        f"Low:  {c['low']:.2f}\n"
-        f"Close:{c['close']:.2f}\n"
-        f"Volume: {c['volume']:.4f}\n"
+        f"🕒 {c.timestamp_utc}\n"
+        f"Open: {c.open:.2f}\n"
+        f"High: {c.high:.2f}\n"
+        f"Low:  {c.low:.2f}\n"
+        f"Close:{c.close:.2f}\n"
+        f"Volume: {c.volume:.4f}\n"
     )
     await cb.message.answer(txt, reply_markup=main_menu())
     await cb.answer()
 
 
 @router.callback_query(F.data == "chart")
-async def chart(cb: CallbackQuery):
-    df = load_df_last_n(300)
-    out_path = "data/processed/chart_last_300.png"
-    make_candles_chart(df, out_path)
+async def chart(cb: CallbackQuery, compute):
+    out_path = await compute(_build_chart)
     photo = FSInputFile(out_path)
     await cb.message.answer_photo(photo, caption="🕯 Свечной график (последние 300 часов)", reply_markup=main_menu())
     await cb.answer()
 
 
 @router.callback_query(F.data == "indicators")
-async def indicators(cb: CallbackQuery):
-    df = load_df_last_n(400)
-    ind = calc_indicators(df)
+async def indicators(cb: CallbackQuery, compute):
+    ind = await compute(_build_indicators)
     txt = (
         "📊 Индикаторы (по последним данным)\n"
         f"RSI(14): {ind['rsi']:.2f}\n"
@@ -77,11 +94,11 @@ async def indicators(cb: CallbackQuery):
 
 
 @router.callback_query(F.data == "forecast")
-async def forecast(cb: CallbackQuery):
-    c = get_last_candle()
+async def forecast(cb: CallbackQuery, compute):
+    c = await compute(_build_last_candle)
     txt = (
         "🔮 Прогноз (пока заглушка)\n"
-        f"Текущая цена (close): {c['close']:.2f}\n\n"
+        f"Текущая цена (close): {c.close:.2f}\n\n"
         "Дальше подключим модель напарника через API /predict и будем выдавать:\n"
         "— прогноз на 1h и 1d\n"
         "— интервал (квантили)\n"
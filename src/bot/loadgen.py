@@ -0,0 +1,225 @@
+﻿"""
+Локальный нагрузочный тест webhook-режима.
+
+Поднимает фейковый Telegram Bot API, запускает бота в webhook-режиме с 1 и N воркерами,
+шлёт синтетические callback-апдейты и печатает updates/s и задержки (p50/p95/p99).
+
+Пример:
+    python -m src.bot.loadgen --workers 1,4 --updates 2000 --concurrency 64
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import aiohttp
+from aiohttp import web
+
+FAKE_TOKEN = "123456:LOADTEST"
+FAKE_SECRET = "loadtest-secret"
+ACTIONS = ["price_now", "chart", "indicators", "forecast", "help"]
+
+
+# ---------- фейковый Bot API ----------
+
+def _fake_message(chat_id: int) -> dict:
+    return {
+        "message_id": 1,
+        "date": int(time.time()),
+        "chat": {"id": chat_id, "type": "private"},
+        "text": "ok",
+    }
+
+
+async def _fake_api_handler(request: web.Request) -> web.Response:
+    method = request.match_info["method"]
+    await request.read()
+    if method.startswith("send"):
+        return web.json_response({"ok": True, "result": _fake_message(1)})
+    return web.json_response({"ok": True, "result": True})
+
+
+def run_fake_api(port: int) -> None:
+    app = web.Application(client_max_size=64 * 1024 * 1024)
+    app.router.add_post("/bot{token}/{method}", _fake_api_handler)
+    web.run_app(app, host="127.0.0.1", port=port, print=None)
+
+
+# ---------- генератор нагрузки ----------
+
+def _update(i: int) -> dict:
+    # у каждого апдейта свой пользователь — чтобы не упираться в per-user лимит
+    user_id = 1_000_000 + i
+    return {
+        "update_id": i,
+        "callback_query": {
+            "id": str(i),
+            "from": {"id": user_id, "is_bot": False, "first_name": "load"},
+            "chat_instance": "loadgen",
+            "data": ACTIONS[i % len(ACTIONS)],
+            "message": {
+                "message_id": 1,
+                "date": 0,
+                "chat": {"id": user_id, "type": "private"},
+                "text": "menu",
+            },
+        },
+    }
+
+
+def _wait_port(port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex(("127.0.0.1", port)) == 0:
+                return
+        time.sleep(0.2)
+    raise RuntimeError(f"❌ Порт {port} так и не открылся за {timeout:.0f} c")
+
+
+async def _wait_workers(port: int, workers: int, timeout: float = 60.0) -> None:
+    """
+    Ждём, пока ответят все воркеры: SO_REUSEPORT раскидывает новые соединения
+    по процессам, поэтому опрашиваем /health без keep-alive и собираем id воркеров.
+    """
+    seen: set[int] = set()
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(force_close=True)) as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(f"http://127.0.0.1:{port}/health") as resp:
+                    seen.add((await resp.json())["worker"])
+            except aiohttp.ClientError:
+                await asyncio.sleep(0.1)
+            if len(seen) >= workers:
+                return
+    raise RuntimeError(f"❌ За {timeout:.0f} c ответили только воркеры {sorted(seen)} из {workers}")
+
+
+async def _fire(url: str, n_updates: int, concurrency: int) -> tuple[list[float], int, float]:
+    sem = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    errors = 0
+
+    async with aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=concurrency),
+        headers={"X-Telegram-Bot-Api-Secret-Token": FAKE_SECRET},
+    ) as session:
+
+        async def one(i: int) -> None:
+            nonlocal errors
+            async with sem:
+                t0 = time.perf_counter()
+                try:
+                    async with session.post(url, json=_update(i)) as resp:
+                        await resp.read()
+                        if resp.status != 200:
+                            errors += 1
+                except aiohttp.ClientError:
+                    errors += 1
+                latencies.append(time.perf_counter() - t0)
+
+        t_start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(n_updates)))
+        elapsed = time.perf_counter() - t_start
+
+    return latencies, errors, elapsed
+
+
+def _pct(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def _start(args: list[str], env: dict) -> subprocess.Popen:
+    return subprocess.Popen([sys.executable, "-m", *args], env=env, start_new_session=True)
+
+
+def _stop(proc: subprocess.Popen) -> None:
+    # воркеры — дочерние процессы, гасим всю группу
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+    except ProcessLookupError:
+        pass
+    proc.wait(timeout=30)
+
+
+def bench(workers: int, port: int, api_port: int, n_updates: int, concurrency: int) -> dict:
+    env = dict(
+        os.environ,
+        # иначе .env разработчика перебьёт токен, порт, секрет и число воркеров ниже
+        DOTENV_OVERRIDE="0",
+        TELEGRAM_TOKEN=FAKE_TOKEN,
+        TELEGRAM_API_URL=f"http://127.0.0.1:{api_port}",
+        BOT_MODE="webhook",
+        BOT_WORKERS=str(workers),
+        WEBHOOK_BASE_URL=f"http://127.0.0.1:{port}",
+        WEBHOOK_HOST="127.0.0.1",
+        WEBHOOK_PORT=str(port),
+        WEBHOOK_SECRET=FAKE_SECRET,
+        # ответ на webhook ждёт конца обработки — иначе задержка ничего не значит
+        WEBHOOK_BACKGROUND="0",
+    )
+    bot_proc = _start(["src.bot.main"], env)
+    try:
+        _wait_port(port)
+        asyncio.run(_wait_workers(port, workers))
+        # прогрев: файловый кэш и импорты не должны попадать в замер
+        asyncio.run(_fire(f"http://127.0.0.1:{port}/webhook", len(ACTIONS) * workers, workers))
+        latencies, errors, elapsed = asyncio.run(
+            _fire(f"http://127.0.0.1:{port}/webhook", n_updates, concurrency)
+        )
+    finally:
+        _stop(bot_proc)
+
+    return {
+        "workers": workers,
+        "updates_per_sec": n_updates / elapsed,
+        "p50_ms": _pct(latencies, 0.50) * 1000,
+        "p95_ms": _pct(latencies, 0.95) * 1000,
+        "p99_ms": _pct(latencies, 0.99) * 1000,
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест webhook-режима бота")
+    parser.add_argument("--workers", default="1,4", help="список количества воркеров через запятую")
+    parser.add_argument("--updates", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--api-port", type=int, default=8082)
+    parser.add_argument("--fake-api", action="store_true", help="только поднять фейковый Bot API")
+    args = parser.parse_args()
+
+    if args.fake_api:
+        run_fake_api(args.api_port)
+        return
+
+    api_proc = _start(["src.bot.loadgen", "--fake-api", "--api-port", str(args.api_port)], dict(os.environ))
+    try:
+        _wait_port(args.api_port)
+        results = [
+            bench(int(w), args.port, args.api_port, args.updates, args.concurrency)
+            for w in args.workers.split(",")
+        ]
+    finally:
+        _stop(api_proc)
+
+    print(f"\n{'workers':>8} {'upd/s':>10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'errors':>8}")
+    for r in results:
+        print(
+            f"{r['workers']:>8} {r['updates_per_sec']:>10.1f} {r['p50_ms']:>10.1f} "
+            f"{r['p95_ms']:>10.1f} {r['p99_ms']:>10.1f} {r['errors']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
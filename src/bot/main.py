@@ -1,22 +1,54 @@
 ﻿import asyncio
 from aiogram import Bot, Dispatcher
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 
-from src.common.config import require_telegram_token
+from src.common.config import get_settings, require_telegram_token
 from src.common.logging import setup_logger
 from src.bot.handlers import router
+from src.bot.middlewares import ThrottleMiddleware
+
+
+def create_bot(token: str) -> Bot:
+    """
+    TELEGRAM_API_URL позволяет ходить в локальный Bot API сервер (или в фейковый при нагрузочном тесте).
+    """
+    s = get_settings()
+    if s.telegram_api_url:
+        session = AiohttpSession(api=TelegramAPIServer.from_base(s.telegram_api_url))
+        return Bot(token=token, session=session)
+    return Bot(token=token)
+
+
+def create_dispatcher() -> Dispatcher:
+    s = get_settings()
+    dp = Dispatcher()
+    dp.callback_query.middleware(
+        ThrottleMiddleware(
+            rate_per_sec=s.bot_rate_per_sec,
+            burst=s.bot_burst,
+            heavy_concurrency=s.bot_heavy_concurrency,
+        )
+    )
+    dp.include_router(router)
+    return dp
 
 
 async def main():
     setup_logger()
     token = require_telegram_token()
 
-    bot = Bot(token=token)
-    dp = Dispatcher()
-    dp.include_router(router)
+    bot = create_bot(token)
+    dp = create_dispatcher()
 
     print("✅ Бот запущен. Нажми Ctrl+C для остановки.")
     await dp.start_polling(bot)
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    if get_settings().bot_mode == "webhook":
+        from src.bot.webhook import run_webhook
+
+        run_webhook()
+    else:
+        asyncio.run(main())
@@ -0,0 +1,114 @@
+﻿from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware
+from aiogram.types import CallbackQuery
+from loguru import logger
+
+from src.bot.services.market_data import data_version
+
+# Кнопки, которые грузят данные и считают/рисуют — их ограничиваем общим семафором
+HEAVY_CALLBACKS = frozenset({"chart", "indicators"})
+# Как часто чистим корзины пользователей, которые давно не нажимали кнопки
+BUCKET_SWEEP_SEC = 60.0
+
+
+class TokenBucket:
+    """
+    Простой token bucket: rate токенов в секунду, не больше capacity.
+    """
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def is_full(self, now: float) -> bool:
+        # полная корзина ничем не отличается от новой — её можно выкинуть
+        return self.tokens + (now - self.updated) * self.rate >= self.capacity
+
+
+class ThrottleMiddleware(BaseMiddleware):
+    """
+    Middleware для callback-кнопок:
+    — per-user token bucket (лишние нажатия отбрасываем);
+    — одинаковые запросы в полёте (callback data + текущая свеча) склеиваем в одну задачу,
+      результат получают все ожидающие;
+    — тяжёлые вычисления идут в потоке, одновременно не больше heavy_concurrency.
+
+    Хендлер получает аргумент `compute`: `await compute(fn)` вернёт результат fn().
+    """
+
+    def __init__(self, rate_per_sec: float, burst: int, heavy_concurrency: int):
+        self.rate_per_sec = rate_per_sec
+        self.burst = burst
+        self._buckets: dict[int, TokenBucket] = {}
+        self._last_sweep = time.monotonic()
+        self._inflight: dict[tuple, asyncio.Task] = {}
+        self._heavy_sem = asyncio.Semaphore(max(1, heavy_concurrency))
+
+    def _sweep(self) -> None:
+        now = time.monotonic()
+        if now - self._last_sweep < BUCKET_SWEEP_SEC:
+            return
+        self._last_sweep = now
+        for user_id in [uid for uid, b in self._buckets.items() if b.is_full(now)]:
+            del self._buckets[user_id]
+
+    def _allow(self, user_id: int) -> bool:
+        self._sweep()
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            bucket = self._buckets[user_id] = TokenBucket(self.rate_per_sec, self.burst)
+        return bucket.take()
+
+    async def _run(self, action: str, fn: Callable[[], Any]) -> Any:
+        if action in HEAVY_CALLBACKS:
+            async with self._heavy_sem:
+                return await asyncio.to_thread(fn)
+        return await asyncio.to_thread(fn)
+
+    async def _shared(self, action: str, fn: Callable[[], Any]) -> Any:
+        key = (action, data_version())
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._run(action, fn))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t: self._inflight.pop(key, None))
+        else:
+            logger.debug(f"Склеиваю запрос {action} с уже выполняющимся\n")
+        # shield: отмена одного ожидающего не должна отменять общую задачу
+        return await asyncio.shield(task)
+
+    async def __call__(
+        self,
+        handler: Callable[[CallbackQuery, dict[str, Any]], Awaitable[Any]],
+        event: CallbackQuery,
+        data: dict[str, Any],
+    ) -> Any:
+        if not self._allow(event.from_user.id):
+            await event.answer("⏳ Слишком часто. Подожди пару секунд.", show_alert=False)
+            return None
+
+        action = event.data or ""
+
+        async def compute(fn: Callable[[], Any]) -> Any:
+            return await self._shared(action, fn)
+
+        data["compute"] = compute
+        return await handler(event, data)
@@ -0,0 +1,87 @@
+﻿from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ("open", "high", "low", "close", "volume")
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def as_ns(ts: np.ndarray) -> np.ndarray:
+    """
+    datetime64 любого разрешения -> int64 наносекунды (без копии, если уже ns).
+    """
+    return ts.astype("datetime64[ns]", copy=False).view("int64")
+
+
+class Candle:
+    """
+    Одна свеча — лёгкая запись вместо строки DataFrame.
+    """
+
+    __slots__ = ("ts_ns", "open", "high", "low", "close", "volume")
+
+    def __init__(self, ts_ns: int, open: float, high: float, low: float, close: float, volume: float):
+        self.ts_ns = ts_ns
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+    @property
+    def timestamp_utc(self) -> datetime:
+        return _EPOCH + timedelta(microseconds=self.ts_ns // 1000)
+
+
+class Candles:
+    """
+    Свечи колонками: ts (int64, наносекунды UTC) и float64-массивы OHLCV.
+    Срезы — это view на те же массивы, без копий. В pandas переводим только на границах.
+    """
+
+    __slots__ = ("ts", "open", "high", "low", "close", "volume")
+
+    def __init__(
+        self,
+        ts: np.ndarray,
+        open: np.ndarray,
+        high: np.ndarray,
+        low: np.ndarray,
+        close: np.ndarray,
+        volume: np.ndarray,
+    ):
+        self.ts = ts
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    def tail(self, n: int) -> Candles:
+        start = max(0, len(self.ts) - n)
+        return Candles(*(getattr(self, name)[start:] for name in self.__slots__))
+
+    def last(self) -> Candle:
+        return Candle(
+            int(self.ts[-1]),
+            float(self.open[-1]),
+            float(self.high[-1]),
+            float(self.low[-1]),
+            float(self.close[-1]),
+            float(self.volume[-1]),
+        )
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> Candles:
+        ts = as_ns(pd.to_datetime(df["timestamp_utc"], utc=True).dt.tz_convert(None).to_numpy())
+        order = np.argsort(ts, kind="stable") if np.any(ts[1:] < ts[:-1]) else slice(None)
+        return cls(
+            ts[order],
+            *(df[c].to_numpy(dtype=np.float64)[order] for c in COLUMNS),
+        )
@@ -1,36 +1,54 @@
 ﻿from __future__ import annotations
 
 import os
+import threading
 from datetime import datetime
+import matplotlib
+matplotlib.use("Agg")
 import pandas as pd
 import mplfinance as mpf
 
+from src.bot.services.candles import Candles
 
-def make_candles_chart(df: pd.DataFrame, out_path: str) -> str:
+# pyplot не потокобезопасен, а рисуем мы из рабочих потоков бота
+_plot_lock = threading.Lock()
+
+
+def to_mpf_frame(candles: Candles) -> pd.DataFrame:
+    """
+    Фрейм в формате mplfinance собираем прямо из колонок — без copy/rename/set_index.
+    """
+    return pd.DataFrame(
+        {
+            "Open": candles.open,
+            "High": candles.high,
+            "Low": candles.low,
+            "Close": candles.close,
+            "Volume": candles.volume,
+        },
+        index=pd.DatetimeIndex(candles.ts.view("datetime64[ns]"), tz="UTC", name="Date"),
+        copy=False,
+    )
+
+
+def make_candles_chart(candles: Candles | pd.DataFrame, out_path: str) -> str:
     """
     Рисует свечи и сохраняет картинку.
     """
     os.makedirs(os.path.dirname(out_path), exist_ok=True)
 
-    tmp = df.copy()
-    tmp = tmp.rename(columns={
-        "timestamp_utc": "Date",
-        "open": "Open",
-        "high": "High",
-        "low": "Low",
-        "close": "Close",
-        "volume": "Volume",
-    })
-    tmp["Date"] = pd.to_datetime(tmp["Date"], utc=True)
-    tmp = tmp.set_index("Date")
+    if isinstance(candles, pd.DataFrame):
+        candles = Candles.from_frame(candles)
+    tmp = to_mpf_frame(candles)
 
     title = f"BTC/USDT — последние {len(tmp)} свечей (1h)"
-    mpf.plot(
-        tmp,
-        type="candle",
-        volume=True,
-        title=title,
-        style="yahoo",
-        savefig=dict(fname=out_path, dpi=140, bbox_inches="tight"),
-    )
+    with _plot_lock:
+        mpf.plot(
+            tmp,
+            type="candle",
+            volume=True,
+            title=title,
+            style="yahoo",
+            savefig=dict(fname=out_path, dpi=140, bbox_inches="tight"),
+        )
     return out_path
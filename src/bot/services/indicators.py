@@ -3,6 +3,8 @@
 import pandas as pd
 import numpy as np
 
+from src.bot.services.candles import Candles
+
 
 def ema(s: pd.Series, span: int) -> pd.Series:
     return s.ewm(span=span, adjust=False).mean()
@@ -27,16 +29,40 @@ def macd(close: pd.Series):
     return macd_line, signal, hist
 
 
-def calc_indicators(df: pd.DataFrame) -> dict:
-    close = df["close"].astype(float)
+def _rsi_last(close: np.ndarray, period: int = 14) -> float:
+    # нужен только последний RSI — берём окно из period последних приращений
+    if len(close) <= period:
+        return float("nan")
+    delta = np.diff(close[-(period + 1):])
+    avg_gain = delta.clip(min=0).mean()
+    avg_loss = (-delta).clip(min=0).mean()
+    rs = avg_gain / (avg_loss + 1e-12)
+    return float(100 - (100 / (1 + rs)))
+
+
+def _macd_last(close: np.ndarray) -> tuple[float, float, float]:
+    # те же ewm(adjust=False), что в macd(), но за один проход и без промежуточных Series
+    a_fast, a_slow, a_sig = 2.0 / 13, 2.0 / 27, 2.0 / 10
+    x = close.tolist()
+    fast = slow = x[0]
+    macd_last = sig = 0.0
+    for i, v in enumerate(x):
+        fast = (1.0 - a_fast) * fast + a_fast * v
+        slow = (1.0 - a_slow) * slow + a_slow * v
+        macd_last = fast - slow
+        sig = (1.0 - a_sig) * sig + a_sig * macd_last if i else macd_last
+    return macd_last, sig, macd_last - sig
+
 
-    rsi_series = rsi(close, 14)
-    macd_line, signal, hist = macd(close)
+def calc_indicators(candles: Candles | pd.DataFrame) -> dict:
+    # из DataFrame нужен только close — timestamp_utc не требуем
+    if isinstance(candles, pd.DataFrame):
+        close = candles["close"].to_numpy(dtype=np.float64)
+    else:
+        close = candles.close
 
-    rsi_last = float(rsi_series.iloc[-1])
-    macd_last = float(macd_line.iloc[-1])
-    signal_last = float(signal.iloc[-1])
-    hist_last = float(hist.iloc[-1])
+    rsi_last = _rsi_last(close, 14)
+    macd_last, signal_last, hist_last = _macd_last(close)
 
     # интерпретация RSI
     if rsi_last >= 70:
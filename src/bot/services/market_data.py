@@ -1,18 +1,54 @@
 ﻿import os
+import numpy as np
 import pandas as pd
+import pyarrow.parquet as pq
 from src.common.config import get_settings
+from src.bot.services.candles import COLUMNS, Candle, Candles, as_ns
+
+
+def _require_data(path: str) -> None:
+    if not os.path.exists(path):
+        raise RuntimeError("Нет файла с данными. Сначала запусти download_ohlcv и fix_gaps.")
 
 
 def load_df_last_n(n: int = 300) -> pd.DataFrame:
     s = get_settings()
-    if not os.path.exists(s.data_raw_path):
-        raise RuntimeError("Нет файла с данными. Сначала запусти download_ohlcv и fix_gaps.")
+    _require_data(s.data_raw_path)
     df = pd.read_parquet(s.data_raw_path)
     df["timestamp_utc"] = pd.to_datetime(df["timestamp_utc"], utc=True)
     df = df.sort_values("timestamp_utc").tail(n).reset_index(drop=True)
     return df
 
 
-def get_last_candle():
-    df = load_df_last_n(1)
-    return df.iloc[-1].to_dict()
+def load_candles_last_n(n: int = 300) -> Candles:
+    """
+    Последние n свечей сразу в numpy-колонки: читаем parquet через pyarrow,
+    без DataFrame. Сортировку по времени делаем, только если файл не отсортирован.
+    """
+    s = get_settings()
+    _require_data(s.data_raw_path)
+    table = pq.read_table(s.data_raw_path, columns=["timestamp_utc", *COLUMNS])
+
+    # для одного чанка без пропусков to_numpy() не копирует, tail() — view
+    ts = as_ns(table.column("timestamp_utc").to_numpy())
+    cols = [table.column(c).to_numpy() for c in COLUMNS]
+    if np.any(ts[1:] < ts[:-1]):
+        order = np.argsort(ts, kind="stable")
+        ts, cols = ts[order], [col[order] for col in cols]
+    return Candles(ts, *cols).tail(n)
+
+
+def data_version() -> tuple[int, int]:
+    """
+    Дешёвый ключ текущей свечи: меняется, когда файл с данными перезаписан.
+    """
+    s = get_settings()
+    try:
+        st = os.stat(s.data_raw_path)
+    except FileNotFoundError:
+        return (0, 0)
+    return (st.st_mtime_ns, st.st_size)
+
+
+def get_last_candle() -> Candle:
+    return load_candles_last_n(1).last()
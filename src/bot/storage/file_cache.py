@@ -0,0 +1,164 @@
+﻿from __future__ import annotations
+
+import glob
+import os
+import pickle
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import Any, Callable
+
+try:
+    import fcntl
+except ImportError:  # Windows: там всё равно один воркер (нет SO_REUSEPORT)
+    fcntl = None
+
+from src.common.config import get_settings
+
+
+# Поднимаем, когда меняется тип кэшируемых значений (например, dict -> Candle):
+# записи старой схемы лежат в своей подпапке и удаляются целиком
+CACHE_SCHEMA = 2
+_checked_roots: set[str] = set()
+
+
+def _drop_other_schemas(root: str, current: str) -> None:
+    # один раз на процесс и папку кэша: чужие v*/ и записи из времён до схем (<name>__<tag>.*)
+    if root in _checked_roots:
+        return
+    _checked_roots.add(root)
+    for path in glob.glob(os.path.join(root, "*")):
+        base = os.path.basename(path)
+        if path == current:
+            continue
+        if os.path.isdir(path) and base.startswith("v"):
+            shutil.rmtree(path, ignore_errors=True)
+        elif os.path.isfile(path) and "__" in base:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def _cache_path(name: str, version: tuple, suffix: str) -> str:
+    s = get_settings()
+    schema_dir = os.path.join(s.cache_dir, f"v{CACHE_SCHEMA}")
+    _drop_other_schemas(s.cache_dir, schema_dir)
+    tag = "_".join(str(v) for v in version)
+    return os.path.join(schema_dir, f"{name}__{tag}{suffix}")
+
+
+def _version_of(path: str, name: str) -> tuple | None:
+    tag = os.path.splitext(os.path.basename(path))[0][len(name) + 2:]
+    try:
+        return tuple(int(v) for v in tag.split("_"))
+    except ValueError:
+        return None
+
+
+def _drop_stale(name: str, keep: str, version: tuple) -> None:
+    """
+    Удаляем только версии старше предыдущей: предыдущую кто-то из воркеров ещё
+    может отдавать пользователю, а более новые — не наши (запоздавший воркер
+    с устаревшей версией не должен сносить свежий результат).
+    """
+    older: dict[tuple, list[str]] = {}
+    for path in glob.glob(os.path.join(os.path.dirname(keep), f"{name}__*")):
+        v = _version_of(path, name)
+        if v is not None and v < version:
+            older.setdefault(v, []).append(path)
+    if not older:
+        return
+    previous = max(older)
+    for v, paths in older.items():
+        if v == previous:
+            continue
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+@contextmanager
+def _locked(path: str):
+    """
+    Межпроцессная блокировка на ключ (<name>__<tag>.lock): при промахе кэша
+    считает один воркер, остальные ждут и берут готовый результат.
+    """
+    if fcntl is None:
+        yield
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(os.path.splitext(path)[0] + ".lock", "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _atomic_write(path: str, write: Callable[[str], Any], suffix: str) -> None:
+    """
+    Пишем во временный файл рядом и подменяем через os.replace,
+    чтобы другой воркер никогда не прочитал недописанный файл.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=suffix)
+    os.close(fd)
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _read_value(path: str) -> tuple[bool, Any]:
+    try:
+        with open(path, "rb") as f:
+            return True, pickle.load(f)
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+        return False, None
+
+
+def cached_value(name: str, version: tuple, fn: Callable[[], Any]) -> Any:
+    """
+    Общий для всех процессов кэш значения (pickle на диске), ключ — имя + версия данных.
+    """
+    path = _cache_path(name, version, ".pkl")
+    found, value = _read_value(path)
+    if found:
+        return value
+
+    with _locked(path):
+        # пока ждали блокировку, значение мог посчитать другой воркер
+        found, value = _read_value(path)
+        if found:
+            return value
+
+        value = fn()
+
+        def write(tmp: str) -> None:
+            with open(tmp, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        _atomic_write(path, write, ".pkl")
+        _drop_stale(name, path, version)
+    return value
+
+
+def cached_file(name: str, version: tuple, suffix: str, render: Callable[[str], Any]) -> str:
+    """
+    То же для файлов (картинки графиков): render(path) должен записать файл по пути.
+    Возвращает путь к готовому файлу.
+    """
+    path = _cache_path(name, version, suffix)
+    if os.path.exists(path):
+        return path
+
+    with _locked(path):
+        if not os.path.exists(path):
+            _atomic_write(path, render, suffix)
+            _drop_stale(name, path, version)
+    return path
@@ -0,0 +1,122 @@
+﻿from __future__ import annotations
+
+import asyncio
+import multiprocessing as mp
+import multiprocessing.connection
+import os
+import secrets
+import signal
+import sys
+
+from aiohttp import web
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from loguru import logger
+
+from src.common.config import get_settings, require_telegram_token
+from src.common.logging import setup_logger
+from src.bot.main import create_bot, create_dispatcher
+
+
+async def _set_webhook(token: str, secret: str) -> None:
+    s = get_settings()
+    if not s.webhook_base_url:
+        raise RuntimeError("❌ WEBHOOK_BASE_URL пустой. Укажи публичный адрес бота для webhook-режима.")
+
+    bot = create_bot(token)
+    try:
+        await bot.set_webhook(
+            url=s.webhook_base_url + s.webhook_path,
+            secret_token=secret,
+            drop_pending_updates=s.webhook_drop_pending,
+        )
+    finally:
+        await bot.session.close()
+
+
+def _health(worker_id: int):
+    async def handler(request: web.Request) -> web.Response:
+        return web.json_response({"worker": worker_id, "pid": os.getpid()})
+
+    return handler
+
+
+def _serve(worker_id: int, secret: str) -> None:
+    """
+    Один воркер: свой event loop, свой Bot/Dispatcher, общий порт (SO_REUSEPORT).
+    Кэши свечей/графиков/индикаторов общие — через файловый кэш (src.bot.storage.file_cache).
+    """
+    setup_logger()
+    s = get_settings()
+    token = require_telegram_token()
+
+    bot = create_bot(token)
+    dp = create_dispatcher()
+
+    app = web.Application()
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        handle_in_background=s.webhook_background,
+        secret_token=secret,
+    ).register(app, path=s.webhook_path)
+    setup_application(app, dp, bot=bot)
+    # по нему можно проверить, что воркер уже слушает порт (см. src.bot.loadgen)
+    app.router.add_get("/health", _health(worker_id))
+
+    logger.info(f"Воркер {worker_id} слушает {s.webhook_host}:{s.webhook_port}{s.webhook_path}\n")
+    web.run_app(
+        app,
+        host=s.webhook_host,
+        port=s.webhook_port,
+        reuse_port=s.bot_workers > 1,
+        print=None,
+    )
+
+
+def run_webhook() -> None:
+    """
+    Webhook-режим: регистрируем webhook один раз и поднимаем BOT_WORKERS процессов на одном порту.
+    Несколько воркеров требуют SO_REUSEPORT (Linux/BSD).
+    """
+    setup_logger()
+    s = get_settings()
+    token = require_telegram_token()
+
+    # без секрета любой, кто знает URL, может слать апдейты от имени любого пользователя
+    secret = s.webhook_secret or secrets.token_urlsafe(32)
+    asyncio.run(_set_webhook(token, secret))
+
+    workers = max(1, s.bot_workers)
+    print(f"✅ Бот запущен в webhook-режиме ({workers} воркер(ов)). Нажми Ctrl+C для остановки.")
+    if workers == 1:
+        _serve(0, secret)
+        return
+
+    procs = [mp.Process(target=_serve, args=(i, secret), daemon=True) for i in range(workers)]
+    for p in procs:
+        p.start()
+
+    # SIGTERM (supervisord, kill, systemd) не вызывает atexit multiprocessing —
+    # без обработчика воркеры остались бы сиротами и держали порт
+    def on_term(signum, frame):
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, on_term)
+
+    exit_code = 0
+    try:
+        # ждём, пока не упадёт любой воркер: дальше работать в неполном составе не будем,
+        # пусть супервизор перезапустит сервис целиком
+        ready = mp.connection.wait([p.sentinel for p in procs])
+        dead = [i for i, p in enumerate(procs) if p.sentinel in ready]
+        logger.error(f"❌ Воркер(ы) {dead} завершились, останавливаю остальные\n")
+        exit_code = 1
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for p in procs:
+            if p.is_alive():
+                p.terminate()
+        for p in procs:
+            p.join(timeout=30)
+    sys.exit(exit_code)
@@ -9,8 +9,12 @@ from dotenv import load_dotenv
 ROOT_DIR = Path(__file__).resolve().parents[2]
 ENV_PATH = ROOT_DIR / ".env"
 
-# Явно загружаем .env и разрешаем перезапись переменных
-load_dotenv(dotenv_path=ENV_PATH, override=True)
+# Явно загружаем .env и разрешаем перезапись переменных.
+# DOTENV_OVERRIDE=0 — переменные окружения главнее .env (так бота запускают loadgen и тесты)
+load_dotenv(
+    dotenv_path=ENV_PATH,
+    override=os.getenv("DOTENV_OVERRIDE", "1").strip() not in ("0", "false", "no"),
+)
 
 
 @dataclass(frozen=True)
@@ -23,6 +27,20 @@ class Settings:
     data_raw_path: str
     data_features_path: str
     tz: str
+    bot_rate_per_sec: float
+    bot_burst: int
+    bot_heavy_concurrency: int
+    bot_mode: str
+    bot_workers: int
+    webhook_base_url: str
+    webhook_path: str
+    webhook_host: str
+    webhook_port: int
+    webhook_secret: str
+    webhook_background: bool
+    webhook_drop_pending: bool
+    telegram_api_url: str
+    cache_dir: str
 
 
 def get_settings() -> Settings:
@@ -35,6 +53,20 @@ def get_settings() -> Settings:
         data_raw_path=os.getenv("DATA_RAW_PATH", "data/raw/btcusdt_1h_fixed.parquet").strip(),
         data_features_path=os.getenv("DATA_FEATURES_PATH", "data/processed/features_1h.parquet").strip(),
         tz=os.getenv("TZ", "UTC").strip(),
+        bot_rate_per_sec=float(os.getenv("BOT_RATE_PER_SEC", "0.5")),
+        bot_burst=int(os.getenv("BOT_BURST", "3")),
+        bot_heavy_concurrency=int(os.getenv("BOT_HEAVY_CONCURRENCY", "2")),
+        bot_mode=os.getenv("BOT_MODE", "polling").strip().lower(),
+        bot_workers=int(os.getenv("BOT_WORKERS", "1")),
+        webhook_base_url=os.getenv("WEBHOOK_BASE_URL", "").strip().rstrip("/"),
+        webhook_path=os.getenv("WEBHOOK_PATH", "/webhook").strip(),
+        webhook_host=os.getenv("WEBHOOK_HOST", "0.0.0.0").strip(),
+        webhook_port=int(os.getenv("WEBHOOK_PORT", "8080")),
+        webhook_secret=os.getenv("WEBHOOK_SECRET", "").strip(),
+        webhook_background=os.getenv("WEBHOOK_BACKGROUND", "1").strip() not in ("0", "false", "no"),
+        webhook_drop_pending=os.getenv("WEBHOOK_DROP_PENDING", "0").strip() not in ("0", "false", "no"),
+        telegram_api_url=os.getenv("TELEGRAM_API_URL", "").strip().rstrip("/"),
+        cache_dir=os.getenv("CACHE_DIR", "data/cache").strip(),
     )
 
 
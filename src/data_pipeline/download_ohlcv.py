@@ -39,14 +39,16 @@ def download_incremental(
     out_path: str,
     since: str | None = None,
     max_batches: int = 10000,
+    exchange: ccxt.Exchange | None = None,
 ) -> pd.DataFrame:
     """
     Скачивает свечи OHLCV и сохраняет в parquet.
     Если файл уже есть — докачивает с последней свечи.
     since: 'YYYY-MM-DD' (UTC), используется только если файла ещё нет.
+    exchange: готовый объект биржи (например, фейковый для replay); иначе создаём по exchange_name.
     """
     _ensure_parent(out_path)
-    ex = _make_exchange(exchange_name)
+    ex = exchange if exchange is not None else _make_exchange(exchange_name)
 
     df_existing = pd.DataFrame()
 
@@ -75,19 +75,14 @@ def make_time_features(ts: pd.Series) -> pd.DataFrame:
     return out
 
 
-def main():
-    setup_logger()
-    s = get_settings()
-
-    if not os.path.exists(s.data_raw_path):
-        raise RuntimeError("❌ Нет raw-данных. Сначала запусти download_ohlcv и fix_gaps.")
-
-    df = pd.read_parquet(s.data_raw_path).copy()
+def build_features(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Считает все фичи и таргеты по свечам, строки с NaN выкидывает.
+    """
+    df = df.copy()
     df["timestamp_utc"] = pd.to_datetime(df["timestamp_utc"], utc=True)
     df = df.sort_values("timestamp_utc").reset_index(drop=True)
 
-    logger.info(f"📌 Загружено raw-строк: {len(df)}\n")
-
     # Доходность
     df["ret_1"] = np.log(df["close"]).diff()
 
@@ -131,7 +126,20 @@ def main():
     df["y_1h"] = np.log(df["close"].shift(-1) / df["close"])
     df["y_1d"] = np.log(df["close"].shift(-24) / df["close"])
 
-    df_feat = df.dropna().reset_index(drop=True)
+    return df.dropna().reset_index(drop=True)
+
+
+def main():
+    setup_logger()
+    s = get_settings()
+
+    if not os.path.exists(s.data_raw_path):
+        raise RuntimeError("❌ Нет raw-данных. Сначала запусти download_ohlcv и fix_gaps.")
+
+    df = pd.read_parquet(s.data_raw_path)
+    logger.info(f"📌 Загружено raw-строк: {len(df)}\n")
+
+    df_feat = build_features(df)
     logger.info(f"✅ После dropna осталось строк: {len(df_feat)}\n")
 
     os.makedirs(os.path.dirname(s.data_features_path), exist_ok=True)
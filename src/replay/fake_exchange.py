@@ -0,0 +1,38 @@
+﻿from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+
+class FakeExchange:
+    """
+    Подмена ccxt-биржи для replay: отдаёт записанные свечи, но только до текущего
+    «симулированного» момента. Интерфейс — ровно то, что использует download_incremental.
+    """
+
+    # download_incremental спит rateLimit мс после каждой партии
+    rateLimit = 1
+
+    def __init__(self, candles: pd.DataFrame):
+        df = candles.sort_values("timestamp_utc")
+        ts = pd.to_datetime(df["timestamp_utc"], utc=True)
+        self._ts_ms = (ts.astype("int64") // 1_000_000).to_numpy()
+        self._ohlcv = df[["open", "high", "low", "close", "volume"]].to_numpy(dtype=float)
+        self.now_ms = int(self._ts_ms[-1])
+        self.calls = 0
+
+    def advance_to(self, now_ms: int) -> None:
+        self.now_ms = int(now_ms)
+
+    def load_markets(self) -> dict:
+        return {}
+
+    def fetch_ohlcv(self, symbol: str, timeframe: str = "1h", since: int | None = None, limit: int = 1000) -> list:
+        self.calls += 1
+        lo = 0 if since is None else int(np.searchsorted(self._ts_ms, since, side="left"))
+        hi = int(np.searchsorted(self._ts_ms, self.now_ms, side="right"))
+        hi = min(hi, lo + limit)
+        if lo >= hi:
+            return []
+        rows = np.column_stack([self._ts_ms[lo:hi], self._ohlcv[lo:hi]])
+        return [[int(r[0]), *r[1:].tolist()] for r in rows]
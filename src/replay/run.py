@@ -0,0 +1,312 @@
+﻿"""
+Детерминированный replay: прогоняет записанную историю свечей час за часом
+(ускоренно) через весь цикл — докачка с фейковой биржи, fix_gaps, validate,
+make_features и хендлеры бота с синтетическими пользователями.
+
+Собирает разбивку задержек по стадиям для каждого часа (stages.csv) и профиль
+(cProfile или сэмплирующий профайлер). По отношению «последние часы / первые часы»
+видно, какие стадии растут вместе с историей, а какие остаются O(новых данных).
+
+Пример:
+    python -m src.replay.run --start 2000 --hours 48 --users 20 --profiler sample
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import cProfile
+import csv
+import inspect
+import os
+import pstats
+import random
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+# config при импорте подгружает .env с override=True — импортируем его раньше,
+# чем переопределяем пути, иначе .env молча вернёт боевые DATA_RAW_PATH/CACHE_DIR
+from src.common.config import get_settings
+from src.replay.fake_exchange import FakeExchange
+from src.replay.sampler import StackSampler
+
+HOUR_MS = 3600 * 1000
+STAGES = ["download", "fix_gaps", "validate", "make_features", "bot"]
+ACTIONS = ["price_now", "chart", "indicators", "forecast", "help"]
+
+
+# ---------- фейковый Telegram ----------
+
+class _FakeMessage:
+    def __init__(self):
+        self.sent = 0
+
+    async def answer(self, *args, **kwargs):
+        self.sent += 1
+
+    async def answer_photo(self, *args, **kwargs):
+        self.sent += 1
+
+
+class _FakeUser:
+    def __init__(self, user_id: int):
+        self.id = user_id
+
+
+class _FakeCallback:
+    """
+    Ровно те поля CallbackQuery, которые трогают хендлеры и ThrottleMiddleware.
+    """
+
+    def __init__(self, user_id: int, data: str):
+        self.from_user = _FakeUser(user_id)
+        self.data = data
+        self.message = _FakeMessage()
+
+    async def answer(self, *args, **kwargs):
+        pass
+
+
+def _bot_handlers() -> dict:
+    from src.bot import handlers
+
+    return {
+        "price_now": handlers.price_now,
+        "chart": handlers.chart,
+        "indicators": handlers.indicators,
+        "forecast": handlers.forecast,
+        "help": handlers.help_cb,
+    }
+
+
+async def _call_handler(fn, event: _FakeCallback, data: dict):
+    # как aiogram: передаём хендлеру только те аргументы, которые он принимает
+    params = inspect.signature(fn).parameters
+    return await fn(event, **{k: v for k, v in data.items() if k in params})
+
+
+async def _simulate_users(mw, handlers: dict, rng: random.Random, n_users: int) -> list[float]:
+    latencies: list[float] = []
+
+    async def one(user_id: int, action: str) -> None:
+        ev = _FakeCallback(user_id, action)
+        t0 = time.perf_counter()
+        await mw(lambda e, d: _call_handler(handlers[action], e, d), ev, {})
+        latencies.append(time.perf_counter() - t0)
+
+    requests = [(rng.randrange(1, 10 * n_users + 1), rng.choice(ACTIONS)) for _ in range(n_users)]
+    await asyncio.gather(*(one(uid, action) for uid, action in requests))
+    return latencies
+
+
+# ---------- цикл replay ----------
+
+@contextmanager
+def _stage(timings: dict, name: str):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + (time.perf_counter() - t0)
+
+
+async def replay(
+    history_path: str,
+    workdir: str,
+    start: int,
+    hours: int,
+    users: int,
+    seed: int,
+    hour_seconds: float,
+) -> list[dict]:
+    # стадии пайплайна получают пути явно; бот-код читает их из get_settings(),
+    # поэтому для него переопределяем env (после того как config уже загрузил .env)
+    raw_path = os.path.join(workdir, "btcusdt_1h.parquet")
+    fixed_path = os.path.join(workdir, "btcusdt_1h_fixed.parquet")
+    features_path = os.path.join(workdir, "features_1h.parquet")
+    cache_dir = os.path.join(workdir, "cache")
+    # остатки прошлого прогона в --workdir — это «будущие» свечи: докачка вернёт
+    # пустоту, и все стадии молча пойдут по чужой истории
+    for path in (raw_path, fixed_path, features_path):
+        if os.path.exists(path):
+            os.remove(path)
+    shutil.rmtree(cache_dir, ignore_errors=True)
+
+    os.environ["DATA_RAW_PATH"] = fixed_path
+    os.environ["DATA_FEATURES_PATH"] = features_path
+    os.environ["CACHE_DIR"] = cache_dir
+    s = get_settings()
+    if (s.data_raw_path, s.cache_dir) != (fixed_path, cache_dir):
+        raise RuntimeError("❌ Не удалось переключить бота на данные replay — проверь .env.")
+
+    from src.bot.middlewares import ThrottleMiddleware
+    from src.data_pipeline.download_ohlcv import download_incremental
+    from src.data_pipeline.fix_gaps import fix_hourly_gaps
+    from src.data_pipeline.make_features import build_features
+    from src.data_pipeline.validate_ohlcv import validate
+
+    history = pd.read_parquet(history_path)
+    history["timestamp_utc"] = pd.to_datetime(history["timestamp_utc"], utc=True)
+    history = history.sort_values("timestamp_utc").reset_index(drop=True)
+    if start < 1:
+        raise RuntimeError("❌ --start должен быть не меньше 1: до начала replay нужна хотя бы одна свеча.")
+    if start >= len(history):
+        raise RuntimeError(f"❌ --start {start} больше длины истории ({len(history)} свечей).")
+
+    ex = FakeExchange(history)
+    t0_ms = int(history["timestamp_utc"].iloc[start - 1].timestamp() * 1000)
+    last_ms = int(history["timestamp_utc"].iloc[-1].timestamp() * 1000)
+
+    handlers = _bot_handlers()
+    # лимиты в replay не нужны — иначе ускоренное время режет трафик
+    mw = ThrottleMiddleware(rate_per_sec=1e9, burst=10**9, heavy_concurrency=2)
+    rng = random.Random(seed)
+
+    rows: list[dict] = []
+    for hour in range(hours + 1):
+        now_ms = t0_ms + hour * HOUR_MS
+        if now_ms > last_ms:
+            logger.warning("История закончилась раньше, чем --hours\n")
+            break
+        ex.advance_to(now_ms)
+
+        t_hour = time.perf_counter()
+        timings: dict[str, float] = {}
+
+        with _stage(timings, "download"):
+            df_raw = download_incremental(
+                exchange_name="fake",
+                symbol="BTC/USDT",
+                timeframe="1h",
+                out_path=raw_path,
+                exchange=ex,
+            )
+        with _stage(timings, "fix_gaps"):
+            df_fixed, missing = fix_hourly_gaps(df_raw)
+            df_fixed.to_parquet(fixed_path, index=False)
+        with _stage(timings, "validate"):
+            validate(fixed_path, "1h")
+        with _stage(timings, "make_features"):
+            build_features(df_fixed).to_parquet(features_path, index=False)
+        with _stage(timings, "bot"):
+            bot_lat = await _simulate_users(mw, handlers, rng, users)
+
+        row = {
+            "hour": hour,
+            "sim_time": pd.Timestamp(now_ms, unit="ms", tz="UTC").isoformat(),
+            "rows": len(df_fixed),
+            "missing": missing,
+        }
+        for name in STAGES:
+            row[f"{name}_ms"] = timings[name] * 1000
+        row["bot_p50_ms"] = float(np.percentile(bot_lat, 50)) * 1000 if bot_lat else 0.0
+        row["bot_p95_ms"] = float(np.percentile(bot_lat, 95)) * 1000 if bot_lat else 0.0
+        rows.append(row)
+
+        spent = time.perf_counter() - t_hour
+        if hour_seconds > spent:
+            await asyncio.sleep(hour_seconds - spent)
+
+    return rows
+
+
+# ---------- отчёт ----------
+
+def _write_csv(rows: list[dict], path: str) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        w.writeheader()
+        w.writerows(rows)
+
+
+def _print_summary(rows: list[dict]) -> None:
+    # час 0 — первичная загрузка всей истории, в статистику по часам её не берём
+    steady = rows[1:] or rows
+    k = max(1, len(steady) // 10)
+    head, tail = steady[:k], steady[-k:]
+    rows_growth = np.mean([r["rows"] for r in tail]) / np.mean([r["rows"] for r in head])
+
+    print(f"\nЧасов: {len(rows) - 1}, строк: {rows[0]['rows']} → {rows[-1]['rows']} (x{rows_growth:.3f} между первыми и последними {k})")
+    print(f"{'stage':>14} {'mean ms':>10} {'p95 ms':>10} {'first ms':>10} {'last ms':>10} {'growth':>8}")
+    for name in STAGES:
+        vals = [r[f"{name}_ms"] for r in steady]
+        first = np.mean([r[f"{name}_ms"] for r in head])
+        last = np.mean([r[f"{name}_ms"] for r in tail])
+        print(
+            f"{name:>14} {np.mean(vals):>10.1f} {np.percentile(vals, 95):>10.1f} "
+            f"{first:>10.1f} {last:>10.1f} {last / max(first, 1e-9):>8.2f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay записанной истории через пайплайн и бота с профилированием")
+    parser.add_argument("--history", default="data/raw/btcusdt_1h.parquet")
+    parser.add_argument("--start", type=int, default=2000, help="сколько свечей уже «скачано» до начала replay")
+    parser.add_argument("--hours", type=int, default=48, help="сколько часов проиграть")
+    parser.add_argument("--users", type=int, default=20, help="запросов к боту за симулированный час")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--hour-seconds", type=float, default=0.0, help="реальных секунд на час (0 — без пауз)")
+    parser.add_argument("--profiler", choices=["none", "cprofile", "sample"], default="none")
+    parser.add_argument("--out", default="data/replay")
+    parser.add_argument("--workdir", default=None, help="куда писать parquet/кэш (по умолчанию — временная папка)")
+    args = parser.parse_args()
+
+    # download_incremental много пишет в INFO на каждый час — оставляем только предупреждения
+    logger.remove()
+    logger.add(sink=lambda msg: print(msg, end=""), level="WARNING", colorize=True)
+
+    os.makedirs(args.out, exist_ok=True)
+    tmp = None
+    workdir = args.workdir
+    if workdir is None:
+        tmp = tempfile.TemporaryDirectory(prefix="btc_replay_")
+        workdir = tmp.name
+    os.makedirs(workdir, exist_ok=True)
+
+    profiler = cProfile.Profile() if args.profiler == "cprofile" else None
+    sampler = StackSampler() if args.profiler == "sample" else None
+    if profiler is not None:
+        profiler.enable()
+    if sampler is not None:
+        sampler.start()
+
+    try:
+        rows = asyncio.run(
+            replay(args.history, workdir, args.start, args.hours, args.users, args.seed, args.hour_seconds)
+        )
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        if sampler is not None:
+            sampler.stop()
+        if tmp is not None:
+            tmp.cleanup()
+
+    csv_path = os.path.join(args.out, "stages.csv")
+    _write_csv(rows, csv_path)
+    _print_summary(rows)
+    print(f"\nПо часам: {csv_path}")
+
+    if profiler is not None:
+        prof_path = os.path.join(args.out, "replay.prof")
+        profiler.dump_stats(prof_path)
+        print(f"cProfile (только основной поток): {prof_path}\n")
+        pstats.Stats(prof_path).sort_stats("cumulative").print_stats(25)
+
+    if sampler is not None:
+        folded_path = os.path.join(args.out, "replay.folded")
+        sampler.dump_folded(folded_path)
+        print(f"Сэмплы (все потоки, folded stacks): {folded_path}\n")
+        print(f"{'self':>8} {'incl':>8}  функция")
+        for name, self_n, incl_n in sampler.top(25):
+            print(f"{self_n:>8} {incl_n:>8}  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+﻿from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# Листовые кадры, означающие, что поток просто ждёт (пул потоков, event loop, Event.wait)
+IDLE_LEAVES = frozenset({
+    "thread.py:_worker",
+    "threading.py:wait",
+    "selectors.py:select",
+    "queue.py:get",
+})
+
+
+class StackSampler:
+    """
+    Простой сэмплирующий профайлер: раз в interval секунд снимает стеки всех потоков
+    (в отличие от cProfile видит и рабочие потоки бота из asyncio.to_thread).
+    Результат — folded stacks, их понимают flamegraph.pl и speedscope.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @staticmethod
+    def _frame_name(frame) -> str:
+        code = frame.f_code
+        return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.is_set():
+            for tid, frame in sys._current_frames().items():
+                if tid == own:
+                    continue
+                if self._frame_name(frame) in IDLE_LEAVES:
+                    continue
+                names = []
+                while frame is not None:
+                    names.append(self._frame_name(frame))
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(names))] += 1
+            time.sleep(self.interval)
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def dump_folded(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def top(self, n: int = 25) -> list[tuple[str, int, int]]:
+        """
+        (функция, self-сэмплы, inclusive-сэмплы), отсортировано по inclusive.
+        """
+        self_cnt: Counter[str] = Counter()
+        incl_cnt: Counter[str] = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            self_cnt[frames[-1]] += count
+            for name in set(frames):
+                incl_cnt[name] += count
+        return [(name, self_cnt[name], incl) for name, incl in incl_cnt.most_common(n)]